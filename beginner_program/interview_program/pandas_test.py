@@ -17,11 +17,11 @@ print(df)
 print("\nNull Counts:")
 print(df.isnull().sum())
 
+# Compute the fill values in one pass: ColB mean and ColC median
+stats = df[['ColB', 'ColC']].agg({'ColB': 'mean', 'ColC': 'median'})
+
 # Fill nulls using fillna() with a dictionary
-df = df.fillna({
-    'ColB': df['ColB'].mean(),      # Fill ColB nulls with mean
-    'ColC': df['ColC'].median()     # Fill ColC nulls with median
-})
+df.fillna(stats.to_dict(), inplace=True)
 
 print("\n--- DataFrame After Filling Nulls ---")
 print(df)
@@ -37,11 +37,7 @@ data = {
 }
 df = pd.DataFrame(data)
 
-ds = df.fillna({
-    'col_b':df['col_b'].mean()
-    })
-df = df.fillna({
-    'col_b': df['col_b'].mean()
-})
-print(ds)
+m = df['col_b'].mean()
+df['col_b'] = df['col_b'].fillna(m)
+print(df)
 
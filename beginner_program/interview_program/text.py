@@ -1,10 +1,10 @@
 import pandas as pd
 import re
 
-df = pd.read_csv(r"E:\Ram\python\test.csv")
+df = pd.read_csv(r"E:\Ram\python\test.csv", engine="pyarrow", dtype_backend="pyarrow")
 
-# convert everything to string first
-df["price"] = df["price"].astype(str)
+# convert everything to an Arrow-backed string first
+df["price"] = df["price"].astype("string[pyarrow]")
 
 # remove all characters except 0-9 and .
 df["price"] = df["price"].str.replace(r"[^\d.]", "", regex=True)
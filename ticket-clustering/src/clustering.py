@@ -9,10 +9,15 @@ Date: October 2025
 """
 
 import os
+import hashlib
+import inspect
 import nltk
 from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.cluster import KMeans
+from sklearn.cluster import KMeans, MiniBatchKMeans
+from sklearn.decomposition import TruncatedSVD
 from sklearn.metrics import silhouette_score
+from joblib import Memory, Parallel, delayed
+from threadpoolctl import threadpool_limits
 import pandas as pd
 import numpy as np
 import re
@@ -22,29 +27,247 @@ from nltk.stem import PorterStemmer
 from pathlib import Path
 
 
+BACKENDS = ('sklearn', 'cuml', 'faiss')
+
+INPUT_COLUMNS = ['Inquiry_id', 'Question']
+
+NLTK_RESOURCES = ('corpora/stopwords', 'corpora/wordnet')
+_NLTK_READY = False
+
+# Cleanup patterns, applied to lowercased text. They stay RE2-compatible so
+# preprocess_series can run them as Arrow kernels; preprocess_text uses the
+# compiled versions.
+NON_ALPHA_PATTERN = r'[^a-z+]'
+GREETING_PATTERN = r'\b(?:kindly|hi|hello)\b'
+SHORT_WORD_PATTERN = r'\b\w{1,2}\b'
+WHITESPACE_PATTERN = r'\s+'
+
+_NON_ALPHA_RE = re.compile(NON_ALPHA_PATTERN)
+_GREETING_RE = re.compile(GREETING_PATTERN)
+_SHORT_WORD_RE = re.compile(SHORT_WORD_PATTERN)
+_WHITESPACE_RE = re.compile(WHITESPACE_PATTERN)
+
+
+def _ensure_nltk():
+    """Download the required NLTK data once per process, if it is missing."""
+    global _NLTK_READY
+    if _NLTK_READY:
+        return
+    for resource in NLTK_RESOURCES:
+        try:
+            nltk.data.find(resource)
+        except LookupError:
+            nltk.download(resource.split('/')[-1], quiet=True)
+    _NLTK_READY = True
+
+
+def _import_cuml():
+    """Import the RAPIDS modules required by the ``cuml`` backend."""
+    try:
+        from cuml.cluster import KMeans as cuKMeans
+        import cupyx.scipy.sparse as csp
+    except ImportError as exc:
+        raise ImportError(
+            "The 'cuml' backend requires RAPIDS cuML and CuPy to be installed."
+        ) from exc
+    return cuKMeans, csp
+
+
+def _import_faiss():
+    """Import FAISS, required by the ``faiss`` backend."""
+    try:
+        import faiss
+    except ImportError as exc:
+        raise ImportError(
+            "The 'faiss' backend requires faiss-cpu or faiss-gpu to be installed."
+        ) from exc
+    return faiss
+
+
+def _silhouette_gpu(X_gpu, labels_gpu, chunk=4096):
+    """
+    Compute the mean silhouette coefficient on the GPU.
+
+    Pairwise Euclidean distances are computed in row chunks so that only a
+    (chunk, n_samples) block is resident at a time.
+
+    Args:
+        X_gpu: Dense CuPy feature matrix
+        labels_gpu: CuPy array of cluster labels
+        chunk (int): Number of rows per distance block
+
+    Returns:
+        float: Mean silhouette coefficient over all samples
+    """
+    import cupy as cp
+
+    n_samples = X_gpu.shape[0]
+    labels_gpu = labels_gpu.astype(cp.int64)
+    n_clusters = int(labels_gpu.max()) + 1
+    counts = cp.bincount(labels_gpu, minlength=n_clusters).astype(X_gpu.dtype)
+    one_hot = cp.zeros((n_samples, n_clusters), dtype=X_gpu.dtype)
+    one_hot[cp.arange(n_samples), labels_gpu] = 1
+    sq_norms = (X_gpu * X_gpu).sum(axis=1)
+
+    total = 0.0
+    for start in range(0, n_samples, chunk):
+        stop = min(start + chunk, n_samples)
+        rows = cp.arange(stop - start)
+        sq_dist = (sq_norms[start:stop, None] + sq_norms[None, :]
+                   - 2 * X_gpu[start:stop] @ X_gpu.T)
+        dist = cp.sqrt(cp.maximum(sq_dist, 0))
+        # Rounding leaves small non-zero self-distances, force them to zero
+        dist[rows, cp.arange(start, stop)] = 0
+
+        # Per-cluster distance totals for every row in the chunk
+        cluster_dist = dist @ one_hot
+        own = labels_gpu[start:stop]
+        own_size = counts[own]
+        a = cluster_dist[rows, own] / cp.maximum(own_size - 1, 1)
+        cluster_dist /= cp.maximum(counts, 1)
+        cluster_dist[:, counts == 0] = cp.inf
+        cluster_dist[rows, own] = cp.inf
+        b = cluster_dist.min(axis=1)
+
+        sil = cp.nan_to_num((b - a) / cp.maximum(a, b))
+        # Samples in singleton clusters score zero, as in scikit-learn
+        total += float(cp.where(own_size > 1, sil, 0).sum())
+
+    return total / n_samples
+
+
+def _fit_score(X, kmeans):
+    """
+    Fit a CPU KMeans model and compute its silhouette score.
+
+    Runs in a joblib worker, so native thread pools are limited to one
+    thread to avoid oversubscribing the cores used by the other workers.
+
+    Args:
+        X: Sparse TF-IDF feature matrix
+        kmeans: Unfitted scikit-learn KMeans or MiniBatchKMeans model
+
+    Returns:
+        tuple: Mean silhouette coefficient and the fitted model
+    """
+    with threadpool_limits(limits=1):
+        kmeans.fit(X)
+        score = silhouette_score(
+            X,
+            kmeans.labels_,
+            sample_size=min(10000, X.shape[0]),
+            random_state=42
+        )
+    return score, kmeans
+
+
+def _prepare_features(clustering, input_file, file_size, file_mtime,
+                      stop_words, preprocessing):
+    """
+    Load, preprocess and vectorize the ticket data.
+
+    Cached on disk by cluster_tickets. Apart from input_file, the arguments
+    only serve as the cache key, so changes to the input file or to the
+    preprocessing invalidate it.
+
+    Args:
+        clustering (TicketClustering): Instance used for text preprocessing
+        input_file (str): Path to input CSV file
+        file_size (int): Size of the input file in bytes
+        file_mtime (float): Modification time of the input file
+        stop_words (tuple): Sorted stop words used by clustering
+        preprocessing (tuple): Cleanup patterns and a hash of the
+            preprocessing source, from _preprocessing_key
+
+    Returns:
+        tuple: Full DataFrame, cleaned DataFrame, fitted TfidfVectorizer and
+            TF-IDF feature matrix
+    """
+    df = pd.read_csv(
+        input_file,
+        engine='pyarrow',
+        usecols=INPUT_COLUMNS,
+        dtype_backend='pyarrow'
+    )
+
+    # Preprocess data
+    print("Applying text preprocessing...")
+    df['Description_clean'] = clustering.preprocess_series(df['Question'])
+    clean_data = df[df['Description_clean'] != '']
+
+    # Create features
+    print("Creating TF-IDF features...")
+    vectorizer = TfidfVectorizer(
+        stop_words='english',
+        min_df=2,
+        dtype=np.float32
+    )
+    X = vectorizer.fit_transform(clean_data['Description_clean'])
+    return df, clean_data, vectorizer, X
+
+
+def _preprocessing_key():
+    """
+    Describe the preprocessing code for the feature cache key.
+
+    Returns:
+        tuple: Cleanup patterns and a SHA-256 of the preprocessing methods'
+            source
+    """
+    source = hashlib.sha256()
+    for method in (TicketClustering.preprocess_series,
+                   TicketClustering._lemmatize):
+        source.update(inspect.getsource(method).encode('utf-8'))
+    return (
+        NON_ALPHA_PATTERN,
+        GREETING_PATTERN,
+        SHORT_WORD_PATTERN,
+        WHITESPACE_PATTERN,
+        source.hexdigest()
+    )
+
+
+def _to_numpy(array):
+    """Return an array as NumPy, copying it back from the GPU if needed."""
+    return array.get() if hasattr(array, 'get') else np.asarray(array)
+
+
 class TicketClustering:
     """A class to perform clustering analysis on customer support tickets."""
 
-    def __init__(self, input_file=None, output_file=None):
+    def __init__(self, input_file=None, output_file=None, backend='sklearn',
+                 cache_dir=None, use_cache=True):
         """
         Initialize the TicketClustering class.
 
         Args:
             input_file (str): Path to input CSV file
             output_file (str): Path to output CSV file
+            backend (str): KMeans implementation, 'sklearn' (CPU),
+                'cuml' (GPU via RAPIDS) or 'faiss' (final fit with FAISS)
+            cache_dir (str): Directory for cached preprocessed features
+            use_cache (bool): Reuse preprocessed features while the input
+                file is unchanged
         """
+        if backend not in BACKENDS:
+            raise ValueError(
+                f"Unknown backend '{backend}', expected one of {BACKENDS}"
+            )
+        self.backend = backend
         self.base_dir = Path(__file__).parent.parent
         self.input_file = input_file or self.base_dir / "data/raw/unanswered_reports.csv"
         self.output_file = output_file or self.base_dir / "output/clustered_tickets.csv"
+        self.cache_dir = cache_dir or self.base_dir / "cache"
+        self.use_cache = use_cache
         
         # Download required NLTK data
-        nltk.download('stopwords', quiet=True)
-        nltk.download('wordnet', quiet=True)
+        _ensure_nltk()
 
         # Initialize NLP tools
         self.lemmatizer = WordNetLemmatizer()
         self.stemmer = PorterStemmer()
         self.stop_words = self._initialize_stop_words()
+        self._lemma_cache = {}
 
     def _initialize_stop_words(self):
         """Initialize and customize stop words for ticket processing."""
@@ -71,49 +294,218 @@ class TicketClustering:
             'not', 'un', 'got', 'and', 'or', 'other', 'i', 'dont',
             'know', 'there', 'many', 'too', 'add', 'my'
         }
-        return stop_words - operators
+        return frozenset(stop_words - operators)
+
+    def _lemmatize(self, token):
+        """
+        Lemmatize a token, caching the result for repeated tokens.
+
+        Args:
+            token (str): Token to lemmatize
+
+        Returns:
+            str: Lemmatized token
+        """
+        lemma = self._lemma_cache.get(token)
+        if lemma is None:
+            lemma = self._lemma_cache[token] = self.lemmatizer.lemmatize(token)
+        return lemma
 
     def preprocess_text(self, text):
         """
         Preprocess the text data for clustering.
 
         Args:
-            text (str): Input text to preprocess
+            text (str): Input text to preprocess; missing values are treated
+                as empty text
 
         Returns:
             str: Preprocessed text
         """
-        # Convert to string and lowercase
-        text = str(text).lower()
+        # Convert to string and lowercase, treating missing values as empty
+        text = '' if pd.isna(text) else str(text)
+        text = text.lower()
         
         # Remove non-alphabetic characters
-        text = re.sub(r"[^a-zA-Z+]", " ", text)
+        text = _NON_ALPHA_RE.sub(' ', text)
         
         # Remove greeting words
-        text = re.sub('kindly|hi|hello', '', text)
+        text = _GREETING_RE.sub('', text)
         
         # Tokenize
         tokens = text.split()
         
         # Remove stopwords and lemmatize
+        stop_words = self.stop_words
+        lemmatize = self._lemmatize
         tokens = [
-            self.lemmatizer.lemmatize(token)
+            lemmatize(token)
             for token in tokens
-            if token not in self.stop_words
+            if token not in stop_words
         ]
         
         # Join tokens
         text = " ".join(tokens)
         
-        # Remove punctuation and short words
-        text = text.replace(".", " ").replace(",", " ")
-        text = re.sub(r'\b\w{1,2}\b', '', text)
+        # Remove short words
+        text = _SHORT_WORD_RE.sub('', text)
         
         # Normalize whitespace
-        text = re.sub(r'\s+', ' ', text)
+        text = _WHITESPACE_RE.sub(' ', text)
         
         return text.strip()
 
+    def preprocess_series(self, texts):
+        """
+        Preprocess a column of text data for clustering.
+
+        Applies the same steps as preprocess_text, but runs each regex once
+        over the whole column instead of once per row. Patterns are passed as
+        strings so pandas can run them as Arrow kernels on Arrow-backed text.
+
+        Args:
+            texts (pd.Series): Input texts to preprocess; missing values are
+                treated as empty text
+
+        Returns:
+            pd.Series: Preprocessed texts
+        """
+        texts = texts.fillna('').astype('string[pyarrow]').str.lower()
+        texts = texts.str.replace(NON_ALPHA_PATTERN, ' ', regex=True)
+        texts = texts.str.replace(GREETING_PATTERN, '', regex=True)
+
+        # Remove stopwords and lemmatize each distinct token once
+        tokens = texts.str.split()
+        # A list of str iterates much faster than a NumPy object array
+        vocabulary = pd.unique(tokens.explode().dropna()).tolist()
+        stop_words = self.stop_words
+        lemmatize = self._lemmatize
+        lemmas = {
+            token: lemmatize(token)
+            for token in vocabulary
+            if token not in stop_words
+        }
+        texts = tokens.map(
+            lambda row: " ".join(lemmas[token] for token in row if token in lemmas)
+        ).astype('string[pyarrow]')
+
+        # Remove short words and normalize whitespace
+        texts = texts.str.replace(SHORT_WORD_PATTERN, '', regex=True)
+        texts = texts.str.replace(WHITESPACE_PATTERN, ' ', regex=True)
+        return texts.str.strip()
+
+    def _to_backend(self, X):
+        """
+        Move the feature matrix to the device used by the backend.
+
+        Args:
+            X: Sparse TF-IDF feature matrix
+
+        Returns:
+            Feature matrix accepted by the backend's KMeans
+        """
+        if self.backend == 'cuml':
+            _, csp = _import_cuml()
+            return csp.csr_matrix(X.astype(np.float32, copy=False)).toarray()
+        return X
+
+    def _create_kmeans(self, n_clusters, init=None):
+        """
+        Create an unfitted KMeans model for the configured backend.
+
+        Args:
+            n_clusters (int): Number of clusters
+            init (array): Initial centroids to warm start from; ignored by
+                the cuml backend
+
+        Returns:
+            KMeans model
+        """
+        if self.backend == 'cuml':
+            cuKMeans, _ = _import_cuml()
+            return cuKMeans(
+                n_clusters=n_clusters,
+                init='k-means||',
+                max_iter=300,
+                n_init=1,
+                random_state=42
+            )
+        if init is not None:
+            return KMeans(
+                n_clusters=n_clusters,
+                init=init,
+                max_iter=300,
+                n_init=1,
+                random_state=42
+            )
+        return KMeans(
+            n_clusters=n_clusters,
+            init='k-means++',
+            max_iter=300,
+            n_init=10,
+            random_state=42
+        )
+
+    def _create_sweep_kmeans(self, n_clusters):
+        """
+        Create a cheaper KMeans model used to score candidate cluster counts.
+
+        Args:
+            n_clusters (int): Number of clusters
+
+        Returns:
+            KMeans model
+        """
+        if self.backend == 'cuml':
+            return self._create_kmeans(n_clusters)
+        return MiniBatchKMeans(
+            n_clusters=n_clusters,
+            batch_size=1024,
+            max_iter=100,
+            n_init=3,
+            random_state=42
+        )
+
+    def _fit_faiss(self, X, n_clusters, n_components=128):
+        """
+        Fit the final clustering with FAISS K-Means.
+
+        Wide TF-IDF matrices are first projected with TruncatedSVD so FAISS
+        works on small dense vectors; centroids are mapped back to term space.
+
+        Args:
+            X: Sparse TF-IDF feature matrix
+            n_clusters (int): Number of clusters
+            n_components (int): Number of SVD dimensions to cluster in
+
+        Returns:
+            tuple: Cluster labels and centroids in TF-IDF term space
+        """
+        faiss = _import_faiss()
+        if X.shape[1] > n_components:
+            svd = TruncatedSVD(n_components=n_components, random_state=42)
+            X_dense = svd.fit_transform(X)
+        else:
+            svd = None
+            X_dense = X.toarray()
+        X_dense = np.ascontiguousarray(X_dense, dtype=np.float32)
+
+        kmeans = faiss.Kmeans(
+            X_dense.shape[1],
+            n_clusters,
+            niter=300,
+            nredo=10,
+            seed=42,
+            gpu=faiss.get_num_gpus() > 0
+        )
+        kmeans.train(X_dense)
+        _, labels = kmeans.index.search(X_dense, 1)
+
+        centers = kmeans.centroids
+        if svd is not None:
+            centers = svd.inverse_transform(centers)
+        return labels.ravel(), centers
+
     def find_optimal_clusters(self, X, max_clusters=10):
         """
         Find the optimal number of clusters using silhouette score.
@@ -123,96 +515,116 @@ class TicketClustering:
             max_clusters (int): Maximum number of clusters to try
 
         Returns:
-            int: Optimal number of clusters
+            tuple: Optimal number of clusters and the model fitted with it
         """
-        max_clusters = min(max_clusters, len(X.toarray()) // 8)
-        silhouette_scores = []
+        max_clusters = min(max_clusters, X.shape[0] // 8)
+        results = []
         K = range(2, max_clusters + 1)
         
         print("\nFinding optimal number of clusters...")
-        for k in K:
-            kmeans = KMeans(
-                n_clusters=k,
-                init='k-means++',
-                max_iter=300,
-                n_init=10,
-                random_state=42
+        if self.backend == 'cuml':
+            # A single GPU is shared, so candidates are fitted one at a time
+            X_fit = self._to_backend(X)
+            for k in K:
+                kmeans = self._create_sweep_kmeans(k)
+                kmeans.fit(X_fit)
+                results.append((_silhouette_gpu(X_fit, kmeans.labels_), kmeans))
+        else:
+            results = Parallel(n_jobs=-1)(
+                delayed(_fit_score)(X, self._create_sweep_kmeans(k)) for k in K
             )
-            kmeans.fit(X)
-            score = silhouette_score(X, kmeans.labels_)
-            silhouette_scores.append(score)
+
+        silhouette_scores = [score for score, _ in results]
+        for k, score in zip(K, silhouette_scores):
             print(f"Silhouette score for k={k}: {score:.3f}")
         
-        return K[np.argmax(silhouette_scores)]
+        best = np.argmax(silhouette_scores)
+        return K[best], results[best][1]
 
     def cluster_tickets(self):
         """
         Perform the complete clustering workflow on support tickets.
         """
-        # Load data
+        # Load, preprocess and vectorize data, reusing cached results
         print("Loading data...")
-        df = pd.read_csv(self.input_file)
-        print(f"Data shape: {df.shape}")
-        print(f"Columns: {list(df.columns)}")
-
-        # Select and preprocess data
-        df = df[['Inquiry_id', 'Question']]
-        print("Applying text preprocessing...")
-        df['Description_clean'] = df['Question'].apply(self.preprocess_text)
-        clean_data = df[df['Description_clean'] != '']
+        memory = Memory(self.cache_dir if self.use_cache else None, verbose=0)
+        prepare = memory.cache(_prepare_features, ignore=['clustering'])
+        stat = os.stat(self.input_file)
+        df, clean_data, vectorizer, X = prepare(
+            self,
+            str(self.input_file),
+            stat.st_size,
+            stat.st_mtime,
+            tuple(sorted(self.stop_words)),
+            _preprocessing_key()
+        )
+        print(f"Data shape: {df[INPUT_COLUMNS].shape}")
         print(f"Records after cleaning: {len(clean_data)}")
-
-        # Create features
-        print("Creating TF-IDF features...")
-        vectorizer = TfidfVectorizer(stop_words='english', min_df=2)
-        X = vectorizer.fit_transform(clean_data['Description_clean'])
-        print(f"Feature matrix shape: {X.shape}")
+        print(f"Feature matrix shape: {X.shape}, dtype: {X.dtype}")
 
         # Find optimal clusters and perform clustering
-        optimal_k = self.find_optimal_clusters(X)
+        optimal_k, model = self.find_optimal_clusters(X)
         print(f"\nPerforming K-Means clustering with k={optimal_k}...")
-        
-        model = KMeans(
-            n_clusters=optimal_k,
-            init='k-means++',
-            max_iter=300,
-            n_init=10,
-            random_state=42
-        )
-        model.fit(X)
+        if self.backend == 'faiss':
+            labels, centers = self._fit_faiss(X, optimal_k)
+        else:
+            if isinstance(model, MiniBatchKMeans):
+                # Refine the mini-batch centroids with a full-batch run
+                model = self._create_kmeans(optimal_k, init=model.cluster_centers_)
+                model.fit(X)
+            labels = _to_numpy(model.labels_)
+            centers = _to_numpy(model.cluster_centers_)
 
         # Add labels to the clean data
-        clean_data['Label'] = model.labels_
+        clean_data['Label'] = labels
 
         # Analyze clusters
-        self._analyze_clusters(model, vectorizer, clean_data)
+        self._analyze_clusters(labels, centers, vectorizer, clean_data)
 
         # Save results
-        df['Label'] = model.labels_
-        df.sort_values('Label').to_csv(self.output_file, index=False)
+        # Rows that cleaned to empty text are not clustered and stay unlabelled
+        df['Label'] = pd.Series(labels, index=clean_data.index).astype('Int64')
+        self._save_results(df)
         print(f"\nResults saved to: {self.output_file}")
 
-    def _analyze_clusters(self, model, vectorizer, data):
+    def _save_results(self, df):
+        """
+        Write labelled tickets to the output CSV, grouped by cluster.
+
+        Groups are written in label order, with unlabelled rows last. Rows
+        keep their input order within a group.
+
+        Args:
+            df: DataFrame with a nullable integer 'Label' column
+        """
+        with open(self.output_file, 'w', newline='', encoding='utf-8') as f:
+            df.head(0).to_csv(f, index=False)
+            for _, group in df.groupby('Label', sort=True, dropna=False):
+                group.to_csv(f, index=False, header=False)
+
+    def _analyze_clusters(self, labels, centers, vectorizer, data):
         """
         Analyze and print clustering results.
 
         Args:
-            model: Fitted KMeans model
+            labels: Cluster label of each record
+            centers: Cluster centroids in TF-IDF term space
             vectorizer: Fitted TfidfVectorizer
             data: Preprocessed data DataFrame
         """
         print("\nTop terms per cluster:")
-        order_centroids = model.cluster_centers_.argsort()[:, ::-1]
+        n_clusters = len(centers)
+        order_centroids = centers.argsort()[:, ::-1]
         terms = vectorizer.get_feature_names_out()
+        counts = np.bincount(labels, minlength=n_clusters)
+        total = counts.sum()
         
-        for i in range(model.n_clusters):
-            cluster_size = sum(model.labels_ == i)
-            cluster_percentage = (cluster_size / len(data)) * 100
+        for i in range(n_clusters):
+            cluster_size = counts[i]
+            cluster_percentage = 100.0 * cluster_size / total
             print(f"\nCluster {i} ({cluster_size} records, {cluster_percentage:.1f}%):")
-            print("Top terms:", end=" ")
-            for ind in order_centroids[i, :10]:
-                print(f"{terms[ind]}", end=" ")
-            print("\nSample questions:")
+            print("Top terms:", " ".join(terms[order_centroids[i, :10]]))
+            print("Sample questions:")
             cluster_data = data[data['Label'] == i]
             print(cluster_data['Question'].head(3).to_string())
 
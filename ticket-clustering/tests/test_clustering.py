@@ -0,0 +1,141 @@
+"""Tests for src/clustering.py."""
+
+import shutil
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.metrics import silhouette_score
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+import clustering  # noqa: E402
+
+
+class FakeStopwords:
+    """Stand-in for nltk.corpus.stopwords that needs no NLTK data."""
+
+    @staticmethod
+    def words(language):
+        return ['the', 'is', 'a', 'to']
+
+
+class SuffixLemmatizer:
+    """Stand-in for WordNetLemmatizer that needs no NLTK data."""
+
+    def lemmatize(self, token):
+        return token[:-1] if token.endswith('s') else token
+
+
+@pytest.fixture
+def ticket_clustering(monkeypatch):
+    """TicketClustering using stub NLTK resources."""
+    monkeypatch.setattr(clustering.nltk, 'download', lambda *args, **kwargs: True)
+    monkeypatch.setattr(clustering, 'stopwords', FakeStopwords)
+    monkeypatch.setattr(clustering, 'WordNetLemmatizer', SuffixLemmatizer)
+    return clustering.TicketClustering()
+
+
+@pytest.mark.parametrize('dtype', [object, 'string', 'string[pyarrow]'])
+def test_preprocess_series_matches_preprocess_text(ticket_clustering, dtype):
+    texts = pd.Series(
+        [
+            "Hi, the Routers is DOWN!!",
+            "Please reset my password",
+            "this c++ thing works",
+            "+hi+ hello kindly help",
+            "",
+        ],
+        dtype=dtype,
+    )
+    expected = [ticket_clustering.preprocess_text(text) for text in texts]
+    assert ticket_clustering.preprocess_series(texts).tolist() == expected
+    assert expected[0] == 'router down'
+
+
+def test_missing_values_preprocess_to_empty_text(ticket_clustering):
+    texts = pd.Series(["router down", np.nan, None])
+    assert ticket_clustering.preprocess_series(texts).tolist() == \
+        ['router down', '', '']
+    assert ticket_clustering.preprocess_text(np.nan) == ''
+    assert ticket_clustering.preprocess_text(pd.NA) == ''
+
+
+@pytest.mark.parametrize('labels, chunk', [
+    ([0, 0, 0, 1, 1, 1, 2, 2, 2, 2], 4096),
+    ([0, 0, 0, 1, 1, 1, 2, 2, 2, 2], 3),
+    # Cluster 2 is a singleton and cluster 1 is empty
+    ([0, 0, 0, 0, 3, 3, 3, 3, 3, 2], 4),
+])
+def test_silhouette_gpu_matches_sklearn(monkeypatch, labels, chunk):
+    # NumPy stands in for CuPy, so the GPU code path runs on the CPU
+    monkeypatch.setitem(sys.modules, 'cupy', np)
+    rng = np.random.default_rng(0)
+    X = rng.random((len(labels), 5))
+    labels = np.array(labels)
+
+    score = clustering._silhouette_gpu(X, labels, chunk=chunk)
+    assert score == pytest.approx(silhouette_score(X, labels), abs=1e-8)
+
+
+def test_save_results_groups_by_label(ticket_clustering, tmp_path):
+    ticket_clustering.output_file = tmp_path / "clustered.csv"
+    df = pd.DataFrame({
+        'Inquiry_id': [1, 2, 3, 4, 5],
+        'Question': ['café wifi', 'hi', 'router', 'réseau', 'box'],
+        'Label': pd.array([1, None, 0, 1, 0], dtype='Int64'),
+    })
+    ticket_clustering._save_results(df)
+
+    lines = (tmp_path / "clustered.csv").read_text(encoding='utf-8').splitlines()
+    assert lines == [
+        'Inquiry_id,Question,Label',
+        '3,router,0',
+        '5,box,0',
+        '1,café wifi,1',
+        '4,réseau,1',
+        '2,hi,',
+    ]
+
+
+def test_save_results_writes_header_for_empty_results(ticket_clustering, tmp_path):
+    ticket_clustering.output_file = tmp_path / "clustered.csv"
+    df = pd.DataFrame({
+        'Inquiry_id': pd.Series([], dtype='int64'),
+        'Question': pd.Series([], dtype=object),
+        'Label': pd.array([], dtype='Int64'),
+    })
+    ticket_clustering._save_results(df)
+
+    assert (tmp_path / "clustered.csv").read_text(encoding='utf-8') == \
+        'Inquiry_id,Question,Label\n'
+
+
+def test_cluster_tickets_reuses_cached_features(ticket_clustering, monkeypatch,
+                                                 tmp_path, capsys):
+    input_file = tmp_path / "tickets.csv"
+    shutil.copy(ticket_clustering.input_file, input_file)
+
+    def run():
+        instance = clustering.TicketClustering(
+            input_file=input_file,
+            output_file=tmp_path / "clustered.csv",
+            cache_dir=tmp_path / "cache",
+        )
+        instance.cluster_tickets()
+        output = capsys.readouterr().out
+        assert "Data shape: (88, 2)" in output
+        return "Applying text preprocessing..." in output
+
+    assert run(), "cold run should preprocess"
+    assert not run(), "warm run should load cached features"
+
+    class OtherStopwords:
+        @staticmethod
+        def words(language):
+            return ['the', 'is', 'a', 'to', 'router']
+
+    monkeypatch.setattr(clustering, 'stopwords', OtherStopwords)
+    assert run(), "changed stop words should miss the cache"